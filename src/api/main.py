@@ -1,21 +1,65 @@
 """Main FastAPI application"""
+import asyncio
+import hmac
 import logging
 from contextlib import asynccontextmanager
+import orjson
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from slowapi import Limiter, _rate_limit_exceeded_handler
-from slowapi.util import get_remote_address
-from slowapi.errors import RateLimitExceeded
+from fastapi.responses import ORJSONResponse, Response
 
-from src.config import settings
+from src.config import settings, API_KEY_BYTES, CORS_ORIGINS_TUPLE
+from src.api.middleware.ratelimit import RateLimitMiddleware, WINDOW_SECONDS
 from src.api.routes import health, jobs, plotter
 from src.queue.database import init_db
+from src.queue.manager import queue_manager
 from src.queue.worker import worker
 from src.plotter.controller import plotter as plotter_controller
 
-# Initialize rate limiter
-limiter = Limiter(key_func=get_remote_address, enabled=settings.rate_limit_enabled)
+# Canned 403 body for the API key middleware (avoids building a Response per rejection)
+_FORBIDDEN_BODY = b'{"detail":"Invalid or missing API key. Provide X-API-Key header."}'
+_FORBIDDEN_HEADERS = [
+    (b"content-type", b"application/json"),
+    (b"content-length", str(len(_FORBIDDEN_BODY)).encode()),
+]
+
+
+class APIKeyASGIMiddleware:
+    """
+    Pure ASGI middleware enforcing X-API-Key on protected route prefixes.
+
+    Inspects scope["headers"] directly and short-circuits unauthenticated
+    requests without building Request/Response objects or running FastAPI's
+    dependency resolution. Uses constant-time comparison to prevent timing
+    attacks. Only installed when an API key is configured.
+    """
+
+    def __init__(self, app, api_key: bytes, protected_prefixes: tuple[bytes, ...]):
+        self.app = app
+        self.api_key = api_key
+        self.protected_prefixes = protected_prefixes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].encode().startswith(self.protected_prefixes):
+            await self.app(scope, receive, send)
+            return
+
+        provided = None
+        for name, value in scope["headers"]:
+            if name == b"x-api-key":
+                provided = value
+                break
+
+        if provided is None or not hmac.compare_digest(provided, self.api_key):
+            await send({
+                "type": "http.response.start",
+                "status": 403,
+                "headers": _FORBIDDEN_HEADERS,
+            })
+            await send({"type": "http.response.body", "body": _FORBIDDEN_BODY})
+            return
+
+        await self.app(scope, receive, send)
 
 # Configure logging
 logging.basicConfig(
@@ -30,6 +74,12 @@ async def lifespan(app: FastAPI):
     """Application lifespan handler"""
     # Startup
     logger.info(f"Starting {settings.app_name} v{settings.version}")
+
+    # Eager tasks (Python 3.12+) run new coroutines synchronously until
+    # their first suspension, so awaits that complete immediately (cache
+    # hits, throttled progress writes) skip a full scheduler hop
+    if hasattr(asyncio, "eager_task_factory"):
+        asyncio.get_running_loop().set_task_factory(asyncio.eager_task_factory)
     
     # Initialize database
     logger.info("Initializing database...")
@@ -42,7 +92,10 @@ async def lifespan(app: FastAPI):
     # Start background worker
     logger.info("Starting job worker...")
     await worker.start()
-    
+
+    # Prune old finished jobs periodically
+    queue_manager.start_pruning()
+
     logger.info("Application startup complete")
     
     yield
@@ -50,6 +103,7 @@ async def lifespan(app: FastAPI):
     # Shutdown
     logger.info("Shutting down application...")
     await worker.stop()
+    await queue_manager.stop()
     logger.info("Shutdown complete")
 
 
@@ -58,17 +112,34 @@ app = FastAPI(
     title=settings.app_name,
     version=settings.version,
     description="REST API for controlling AxiDraw pen plotter",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
-# Configure rate limiting
-app.state.limiter = limiter
-app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
+# Configure rate limiting (skipped entirely when disabled)
+if settings.rate_limit_enabled:
+    app.add_middleware(
+        RateLimitMiddleware,
+        rate=settings.rate_limit_requests,
+        window_seconds=WINDOW_SECONDS[settings.rate_limit_window],
+        protected_prefixes=(f"{settings.api_prefix}/jobs",),
+    )
+
+# Configure API key authentication (skipped entirely when no key is set)
+if API_KEY_BYTES is not None:
+    app.add_middleware(
+        APIKeyASGIMiddleware,
+        api_key=API_KEY_BYTES,
+        protected_prefixes=(
+            f"{settings.api_prefix}/jobs".encode(),
+            f"{settings.api_prefix}/plotter".encode(),
+        ),
+    )
 
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=settings.cors_origins,
+    allow_origins=CORS_ORIGINS_TUPLE,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
@@ -91,26 +162,48 @@ async def root():
     }
 
 
-# Error handlers
+# Error handlers - bodies are fixed, so serialize them once at import time
+# instead of going through jsonable_encoder per error
+_NOT_FOUND_BODY = orjson.dumps({
+    "error": "Not found",
+    "detail": "The requested resource was not found"
+})
+_INTERNAL_ERROR_BODY = orjson.dumps({
+    "error": "Internal server error",
+    "detail": "An unexpected error occurred"
+})
+
+
 @app.exception_handler(404)
 async def not_found_handler(request, exc):
     """404 handler"""
-    return {
-        "error": "Not found",
-        "detail": str(exc.detail) if hasattr(exc, 'detail') else "The requested resource was not found"
-    }
+    detail = getattr(exc, 'detail', None)
+    if detail is None:
+        return Response(content=_NOT_FOUND_BODY, status_code=404, media_type="application/json")
+    return Response(
+        content=orjson.dumps({"error": "Not found", "detail": str(detail)}),
+        status_code=404,
+        media_type="application/json"
+    )
 
 
 @app.exception_handler(500)
 async def internal_error_handler(request, exc):
     """500 handler"""
     logger.error(f"Internal server error: {exc}", exc_info=True)
-    return {
-        "error": "Internal server error",
-        "detail": "An unexpected error occurred"
-    }
+    return Response(content=_INTERNAL_ERROR_BODY, status_code=500, media_type="application/json")
 
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8080)
+    # uvloop + httptools replace the default selector loop and pure-Python
+    # HTTP parser with C implementations; access logging costs a logger
+    # call per request and the dashboard polls constantly
+    uvicorn.run(
+        app,
+        host="0.0.0.0",
+        port=8080,
+        loop="uvloop",
+        http="httptools",
+        access_log=False
+    )
@@ -0,0 +1,81 @@
+"""Pure ASGI token-bucket rate limiting middleware"""
+import time
+
+# Canned 429 body (avoids building a Response per rejection)
+_RATE_LIMITED_BODY = b'{"detail":"Rate limit exceeded. Try again later."}'
+_RATE_LIMITED_HEADERS = [
+    (b"content-type", b"application/json"),
+    (b"content-length", str(len(_RATE_LIMITED_BODY)).encode()),
+]
+
+# Window names accepted by settings.rate_limit_window
+WINDOW_SECONDS = {
+    "second": 1,
+    "minute": 60,
+    "hour": 3600,
+    "day": 86400,
+}
+
+
+class RateLimitMiddleware:
+    """
+    Token-bucket rate limiter implemented as pure ASGI middleware.
+
+    Maintains a per-client-IP bucket refilled at rate/window tokens per
+    second, reading the client address straight from scope["client"] —
+    no Request object, no BaseHTTPMiddleware coroutine hop. Buckets are
+    plain dict state; the event loop is single-threaded so no lock is
+    needed. Idle buckets are swept periodically so the map stays bounded
+    by the set of recently active clients rather than every IP ever seen.
+    """
+
+    def __init__(self, app, rate: int, window_seconds: int,
+                 protected_prefixes: tuple[str, ...]):
+        self.app = app
+        self.capacity = float(rate)
+        self.refill_per_sec = rate / window_seconds
+        self.protected_prefixes = protected_prefixes
+        # ip -> (tokens, last_refill_ts)
+        self._buckets: dict[str, tuple[float, float]] = {}
+        # A bucket idle for one full refill window is back at capacity and
+        # indistinguishable from a fresh one, so it can be dropped
+        self._idle_ttl = float(window_seconds)
+        self._sweep_interval = max(self._idle_ttl, 60.0)
+        self._next_sweep = time.monotonic() + self._sweep_interval
+
+    def _sweep(self, now: float) -> None:
+        """Drop buckets idle long enough to be fully refilled"""
+        cutoff = now - self._idle_ttl
+        self._buckets = {
+            ip: bucket for ip, bucket in self._buckets.items()
+            if bucket[1] > cutoff
+        }
+        self._next_sweep = now + self._sweep_interval
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].startswith(self.protected_prefixes):
+            await self.app(scope, receive, send)
+            return
+
+        client = scope.get("client")
+        ip = client[0] if client else "unknown"
+
+        now = time.monotonic()
+        if now >= self._next_sweep:
+            self._sweep(now)
+
+        tokens, last = self._buckets.get(ip, (self.capacity, now))
+        tokens = min(self.capacity, tokens + (now - last) * self.refill_per_sec)
+
+        if tokens < 1.0:
+            self._buckets[ip] = (tokens, now)
+            await send({
+                "type": "http.response.start",
+                "status": 429,
+                "headers": _RATE_LIMITED_HEADERS,
+            })
+            await send({"type": "http.response.body", "body": _RATE_LIMITED_BODY})
+            return
+
+        self._buckets[ip] = (tokens - 1.0, now)
+        await self.app(scope, receive, send)
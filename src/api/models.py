@@ -1,9 +1,13 @@
 """Pydantic models for API"""
+import re
 from datetime import datetime
 from typing import Optional
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
 from enum import Enum
 
+# Only digits, commas, spaces - compiled once at import
+_LAYERS_RE = re.compile(r'^[\d,\s]*$')
+
 
 class JobStatus(str, Enum):
     """Job status"""
@@ -15,6 +19,11 @@ class JobStatus(str, Enum):
     CANCELLED = "cancelled"
 
 
+# Inverse lookup built once - constructing an Enum from its value walks the
+# member table, and job statuses are re-hydrated on every response
+_JOB_STATUS_BY_VALUE = {s.value: s for s in JobStatus}
+
+
 class PlotterState(str, Enum):
     """Plotter state"""
     IDLE = "idle"
@@ -27,9 +36,8 @@ class PlotterState(str, Enum):
 class JobParameters(BaseModel):
     """Job plotting parameters with validation"""
     layers: Optional[str] = Field(
-        None, 
+        None,
         description="Comma-separated layer IDs (e.g., '1,2,3')",
-        pattern=r'^[\d,\s]*$',  # Only digits, commas, spaces
         max_length=100
     )
     speed: int = Field(
@@ -61,6 +69,14 @@ class JobParameters(BaseModel):
         description="Job timeout in seconds (60-86400)"
     )
 
+    @field_validator('layers')
+    @classmethod
+    def _validate_layers(cls, v: Optional[str]) -> Optional[str]:
+        """Check layers against the precompiled pattern"""
+        if v is not None and not _LAYERS_RE.match(v):
+            raise ValueError("layers may only contain digits, commas and spaces")
+        return v
+
 
 class JobCreate(BaseModel):
     """Job creation request"""
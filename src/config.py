@@ -42,5 +42,11 @@ class Settings(BaseSettings):
 # Global settings instance
 settings = Settings()
 
+# Derived constants, computed once at import so hot paths skip Pydantic's
+# __getattr__ and per-request arithmetic
+API_KEY_BYTES = settings.api_key.encode() if settings.api_key else None
+CORS_ORIGINS_TUPLE = tuple(settings.cors_origins)
+MAX_SVG_SIZE_BYTES = settings.max_svg_size_mb * 1024 * 1024
+
 # Ensure directories exist
 settings.uploads_dir.mkdir(parents=True, exist_ok=True)
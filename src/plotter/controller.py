@@ -1,6 +1,7 @@
 """AxiDraw plotter controller - wraps AxiCLI"""
 import asyncio
 import logging
+import re
 import time
 from pathlib import Path
 from typing import Optional, Dict, Any
@@ -9,6 +10,32 @@ from enum import Enum
 
 logger = logging.getLogger(__name__)
 
+# The pyaxidraw API ships with the AxiDraw software bundle. When it is
+# importable we drive the plotter in-process - importing the SVG machinery
+# once at startup instead of spawning a fresh interpreter per job - and
+# fall back to the axicli subprocess otherwise.
+try:
+    from pyaxidraw import axidraw as _pyaxidraw
+except ImportError:
+    _pyaxidraw = None
+
+
+# axicli progress output: either an explicit percentage or "Layer N of M"
+_PROGRESS_RE = re.compile(r'(\d{1,3})\s*%|[Ll]ayer\s+(\d+)\s+of\s+(\d+)')
+
+# Job parameter -> axicli flag tables. One table drives both the CLI
+# command line and the in-process API (the option attribute name is the
+# flag without its "--" prefix), so new flags only need a row here.
+_PARAM_FLAGS = (
+    ("layers", "--layer", str),
+    ("speed", "--speed_pendown", int),
+    ("pen_up_delay", "--pen_delay_up", int),
+    ("pen_down_delay", "--pen_delay_down", int),
+)
+_BOOL_FLAGS = (
+    ("preview", "--preview"),
+)
+
 
 class PlotterState(str, Enum):
     """Plotter state"""
@@ -37,7 +64,16 @@ class AxiDrawController:
         self._jobs_completed = 0
         self._info: Optional[PlotterInfo] = None
         self._current_process: Optional[asyncio.subprocess.Process] = None
-        
+        self._ad = _pyaxidraw.AxiDraw() if _pyaxidraw is not None else None
+        # Task wrapping the in-process plot thread; the thread cannot be
+        # interrupted, so timeout/cancel paths must wait for it to exit
+        # before the shared AxiDraw session is handed to the next job
+        self._plot_thread: Optional[asyncio.Task] = None
+        # Connection info changes rarely; cache it so status endpoints and
+        # health checks don't spawn an interpreter per call
+        self._info_expires_at: float = 0.0
+        self._info_ttl: float = 30.0
+
     def get_uptime(self) -> int:
         """Get service uptime in seconds"""
         return int(time.time() - self._start_time)
@@ -46,14 +82,36 @@ class AxiDrawController:
         """Get number of completed jobs"""
         return self._jobs_completed
     
+    def invalidate_info(self) -> None:
+        """Force the next check_connection call to refresh"""
+        self._info_expires_at = 0.0
+
     async def check_connection(self) -> PlotterInfo:
-        """Check if AxiDraw is connected"""
+        """Check if AxiDraw is connected (cached for a short TTL)"""
+        if self._info is not None and time.monotonic() < self._info_expires_at:
+            return self._info
+
+        if self._ad is not None:
+            # API is loaded in-process - no interpreter spawn needed
+            version = getattr(_pyaxidraw, "__version__", None) or "AxiDraw API"
+            self._info = PlotterInfo(
+                connected=True,
+                model="AxiDraw",
+                firmware=str(version)
+            )
+            logger.info(f"AxiDraw API loaded: {version}")
+            self._info_expires_at = time.monotonic() + self._info_ttl
+            return self._info
+
         try:
             # Try to run axicli with version flag using async subprocess
             process = await asyncio.create_subprocess_exec(
                 "python", "-m", "axicli", "--version",
                 stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
+                stderr=asyncio.subprocess.PIPE,
+                # Lets CPython spawn via posix_spawn instead of fork plus a
+                # /proc/self/fd scan; our listening sockets are CLOEXEC
+                close_fds=False
             )
             
             try:
@@ -83,7 +141,8 @@ class AxiDrawController:
         except Exception as e:
             logger.error(f"Error checking AxiDraw connection: {e}")
             self._info = PlotterInfo(connected=False)
-        
+
+        self._info_expires_at = time.monotonic() + self._info_ttl
         return self._info
     
     async def plot_svg(
@@ -112,77 +171,202 @@ class AxiDrawController:
         self.current_job_id = job_id
         
         try:
-            # Build axicli command
-            cmd = ["python", "-m", "axicli"]
-            
-            # Add parameters
-            if parameters.get("layers"):
-                cmd.extend(["--layer", parameters["layers"]])
-            
-            if parameters.get("speed"):
-                cmd.extend(["--speed_pendown", str(parameters["speed"])])
-                
-            if parameters.get("pen_up_delay"):
-                cmd.extend(["--pen_delay_up", str(parameters["pen_up_delay"])])
-                
-            if parameters.get("pen_down_delay"):
-                cmd.extend(["--pen_delay_down", str(parameters["pen_down_delay"])])
-            
-            if parameters.get("preview"):
-                cmd.append("--preview")
-            
-            # Add SVG file path
-            cmd.append(str(svg_path))
-            
-            logger.info(f"Starting plot job {job_id}: {' '.join(cmd)}")
-            
-            # Execute plotting command using async subprocess
-            self._current_process = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
-            
-            # Monitor process output for progress with timeout
-            try:
-                stdout, stderr = await asyncio.wait_for(
-                    self._current_process.communicate(),
-                    timeout=parameters.get("timeout", 3600)
-                )
-                
-                # Decode output
-                stdout_text = stdout.decode() if stdout else ""
-                stderr_text = stderr.decode() if stderr else ""
-                
-                if self._current_process.returncode == 0:
-                    logger.info(f"Job {job_id} completed successfully")
-                    self._jobs_completed += 1
-                    if progress_callback:
-                        await progress_callback(100)
-                    return True
-                else:
-                    logger.error(f"Job {job_id} failed: {stderr_text}")
-                    self.state = PlotterState.ERROR
-                    return False
-                    
-            except asyncio.TimeoutError:
-                logger.error(f"Job {job_id} timed out")
-                if self._current_process:
-                    self._current_process.kill()
-                    await self._current_process.wait()
-                self.state = PlotterState.ERROR
-                return False
-            
+            if self._ad is not None:
+                return await self._plot_in_process(svg_path, job_id, parameters, progress_callback)
+            return await self._plot_subprocess(svg_path, job_id, parameters, progress_callback)
+
         except Exception as e:
             logger.error(f"Error plotting job {job_id}: {e}")
             self.state = PlotterState.ERROR
             return False
             
         finally:
-            self.state = PlotterState.IDLE
             self.current_job_id = None
             self._current_process = None
-    
+            thread = self._plot_thread
+            self._plot_thread = None
+            if thread is not None and not thread.done():
+                # A timed-out plot thread still owns the hardware session;
+                # stay in ERROR and release to IDLE only once it exits
+                self.state = PlotterState.ERROR
+                thread.add_done_callback(self._on_plot_thread_exit)
+            else:
+                self.state = PlotterState.IDLE
+
+    def _run_plot_sync(self, svg_path: Path, parameters: Dict[str, Any]) -> None:
+        """Run one plot through the in-process AxiDraw API (blocking)"""
+        ad = self._ad
+        ad.plot_setup(str(svg_path))
+
+        if parameters.get("layers"):
+            ad.options.mode = "layers"
+
+        for key, flag, conv in _PARAM_FLAGS:
+            value = parameters.get(key)
+            if value:
+                setattr(ad.options, flag[2:], conv(value))
+
+        for key, flag in _BOOL_FLAGS:
+            if parameters.get(key):
+                setattr(ad.options, flag[2:], True)
+
+        ad.plot_run()
+
+    def _request_stop(self) -> None:
+        """Ask the in-process API to stop the current plot (best effort)"""
+        try:
+            self._ad.plot_status.stopped = True
+            self._ad.transmit_pause_request = True
+        except AttributeError:
+            pass
+
+    async def _await_plot_thread(self, grace: float) -> bool:
+        """Wait up to grace seconds for the plot thread to actually exit"""
+        thread = self._plot_thread
+        if thread is None or thread.done():
+            return True
+        done, _ = await asyncio.wait({thread}, timeout=grace)
+        if done and not thread.cancelled():
+            thread.exception()  # retrieve so it isn't logged as unhandled
+        return bool(done)
+
+    def _on_plot_thread_exit(self, thread: asyncio.Task) -> None:
+        """Release the plotter once a runaway plot thread finally exits"""
+        if not thread.cancelled() and thread.exception() is not None:
+            logger.error(f"Timed-out plot thread exited with: {thread.exception()}")
+        if self.state == PlotterState.ERROR and self.current_job_id is None:
+            self.state = PlotterState.IDLE
+
+    async def _plot_in_process(
+        self,
+        svg_path: Path,
+        job_id: str,
+        parameters: Dict[str, Any],
+        progress_callback=None
+    ) -> bool:
+        """Plot using the imported AxiDraw API in a worker thread"""
+        logger.info(f"Starting plot job {job_id} (in-process API)")
+
+        self._plot_thread = asyncio.create_task(
+            asyncio.to_thread(self._run_plot_sync, svg_path, parameters)
+        )
+        try:
+            # shield: on timeout the task must stay awaitable so we can
+            # wait for the thread to actually let go of the hardware
+            await asyncio.wait_for(
+                asyncio.shield(self._plot_thread),
+                timeout=parameters.get("timeout", 3600)
+            )
+        except asyncio.TimeoutError:
+            logger.error(f"Job {job_id} timed out")
+            self._request_stop()
+            # The thread cannot be interrupted - give it a bounded grace
+            # period; if it is still running, plot_svg's cleanup keeps the
+            # plotter out of IDLE until it exits
+            if not await self._await_plot_thread(grace=30.0):
+                logger.error(f"Job {job_id} plot thread still running after stop request")
+            self.state = PlotterState.ERROR
+            return False
+
+        logger.info(f"Job {job_id} completed successfully")
+        self._jobs_completed += 1
+        if progress_callback:
+            await progress_callback(100)
+        return True
+
+    async def _plot_subprocess(
+        self,
+        svg_path: Path,
+        job_id: str,
+        parameters: Dict[str, Any],
+        progress_callback=None
+    ) -> bool:
+        """Plot by spawning axicli (fallback when pyaxidraw is not importable)"""
+        # Build axicli command from the flag tables
+        cmd = ["python", "-m", "axicli"]
+
+        for key, flag, conv in _PARAM_FLAGS:
+            value = parameters.get(key)
+            if value:
+                cmd.extend((flag, str(conv(value))))
+
+        for key, flag in _BOOL_FLAGS:
+            if parameters.get(key):
+                cmd.append(flag)
+
+        # Add SVG file path
+        cmd.append(str(svg_path))
+
+        logger.info(f"Starting plot job {job_id}: {' '.join(cmd)}")
+
+        # Execute plotting command using async subprocess
+        self._current_process = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            close_fds=False
+        )
+        process = self._current_process
+
+        # Drain stderr concurrently so a chatty process can't fill the pipe
+        # and deadlock against our line-by-line stdout reads
+        stderr_task = asyncio.create_task(process.stderr.read())
+
+        async def _stream_output():
+            """Read stdout line by line, surfacing progress as it arrives"""
+            async for raw_line in process.stdout:
+                # Without a callback nobody consumes progress - keep
+                # draining the pipe but skip the per-line decode work
+                if progress_callback is None:
+                    continue
+                match = _PROGRESS_RE.search(raw_line.decode("utf-8", errors="replace"))
+                if match:
+                    if match.group(1) is not None:
+                        pct = min(int(match.group(1)), 100)
+                    else:
+                        current, total = int(match.group(2)), int(match.group(3))
+                        pct = min(int(current * 100 / total), 100) if total else 0
+                    await progress_callback(pct)
+            await process.wait()
+
+        try:
+            await asyncio.wait_for(
+                _stream_output(),
+                timeout=parameters.get("timeout", 3600)
+            )
+            stderr = await stderr_task
+
+            if process.returncode == 0:
+                logger.info(f"Job {job_id} completed successfully")
+                self._jobs_completed += 1
+                if progress_callback:
+                    await progress_callback(100)
+                return True
+            else:
+                # Only decode stderr on the failure path that logs it
+                stderr_text = stderr.decode("utf-8", errors="replace") if stderr else ""
+                logger.error(f"Job {job_id} failed: {stderr_text}")
+                self.state = PlotterState.ERROR
+                return False
+
+        except asyncio.TimeoutError:
+            logger.error(f"Job {job_id} timed out")
+            stderr_task.cancel()
+            process.kill()
+            await process.wait()
+            self.state = PlotterState.ERROR
+            return False
+
+        except BaseException:
+            # Any other failure while streaming (e.g. a stdout line
+            # overrunning the stream limit, or cancellation) must not leak
+            # a live axicli process that keeps driving the pen
+            stderr_task.cancel()
+            if process.returncode is None:
+                process.kill()
+                await process.wait()
+            raise
+
     async def pause(self) -> bool:
         """Pause current plotting job"""
         # Note: AxiCLI doesn't support pause/resume natively
@@ -202,6 +386,20 @@ class AxiDrawController:
         Terminates the subprocess gracefully (SIGTERM), with fallback to kill (SIGKILL)
         if process doesn't exit within 5 seconds.
         """
+        # In-process plots are stopped through the API's status flags
+        if self._current_process is None and self._ad is not None:
+            if self.state not in (PlotterState.BUSY, PlotterState.PAUSED):
+                logger.warning("No active job to cancel")
+                return False
+            logger.info(f"Cancelling job {self.current_job_id} (in-process API)")
+            self._request_stop()
+            # Only report success once the plot thread has actually stopped
+            # moving the pen (mirrors the 5 s grace on the subprocess path)
+            if not await self._await_plot_thread(grace=5.0):
+                logger.warning(f"Job {self.current_job_id} didn't stop within grace period")
+                return False
+            return True
+
         if not self._current_process or self._current_process.returncode is not None:
             logger.warning("No active process to cancel")
             return False
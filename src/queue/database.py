@@ -1,9 +1,10 @@
 """Database models for job queue"""
 from datetime import datetime, timezone
 from enum import Enum
-from sqlalchemy import Column, String, Integer, DateTime, Text, Index, create_engine
+from sqlalchemy import Column, String, Integer, DateTime, Text, Index, event
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 from src.config import settings
 
@@ -46,13 +47,38 @@ class Job(Base):
     )
 
 
-# Create async engine
+# Create async engine with a real connection pool. The aiosqlite dialect
+# defaults to NullPool, which opens a fresh SQLite connection (plus PRAGMA
+# setup) for every session - pooling keeps connections warm. SQLite
+# serializes writers anyway, so a single pooled connection is enough.
 engine = create_async_engine(
     settings.database_url,
     echo=settings.log_level == "DEBUG",
+    poolclass=AsyncAdaptedQueuePool,
+    pool_size=1,
+    max_overflow=0,
+    pool_pre_ping=True,
+    pool_recycle=1800,
     connect_args={"check_same_thread": False} if "sqlite" in settings.database_url else {}
 )
 
+
+if "sqlite" in settings.database_url:
+    @event.listens_for(engine.sync_engine, "connect")
+    def _configure_sqlite(dbapi_connection, connection_record):
+        """Apply per-connection PRAGMAs once, when the pool opens a connection"""
+        cursor = dbapi_connection.cursor()
+        # WAL lets readers proceed while a writer commits, and
+        # synchronous=NORMAL drops to one fsync per commit instead of two
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute("PRAGMA busy_timeout=5000")
+        cursor.execute("PRAGMA journal_size_limit=67108864")  # cap WAL at 64 MB
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.execute("PRAGMA mmap_size=268435456")  # 256 MB
+        cursor.execute("PRAGMA cache_size=-20000")  # ~20 MB page cache
+        cursor.close()
+
 # Create async session maker
 AsyncSessionLocal = async_sessionmaker(
     engine,
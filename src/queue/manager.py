@@ -1,21 +1,89 @@
 """Job queue manager"""
-import json
+import asyncio
 import logging
-import uuid
+from collections import OrderedDict
 from pathlib import Path
 from typing import Optional, List
-from sqlalchemy import select, func
+from sqlalchemy import select, func, update, delete, bindparam, lambda_stmt
 from sqlalchemy.ext.asyncio import AsyncSession
+from ulid import ULID
 
-from src.queue.database import Job, JobStatus, get_session, utc_now
-from src.api.models import JobParameters, JobResponse
+from src.queue.database import AsyncSessionLocal, Job, JobStatus, get_session, utc_now
+from src.api.models import JobParameters, JobResponse, _JOB_STATUS_BY_VALUE
 
 logger = logging.getLogger(__name__)
 
+# Jobs in these states are finished and eligible for pruning
+_TERMINAL_VALUES = (
+    JobStatus.COMPLETED.value,
+    JobStatus.FAILED.value,
+    JobStatus.CANCELLED.value,
+)
+
+# Hot-path statements built once behind lambda_stmt: SQLAlchemy caches the
+# compiled SQL against the lambda's identity, so repeat executions skip the
+# expression-tree build and Core compile entirely.
+_GET_JOB_STMT = lambda_stmt(
+    lambda: select(Job).where(Job.id == bindparam("id"))
+)
+_NEXT_JOB_STMT = lambda_stmt(
+    lambda: select(Job)
+    .where(Job.status == JobStatus.QUEUED.value)
+    .order_by(Job.created_at.asc())
+    .limit(1)
+)
+_QUEUE_SIZE_STMT = lambda_stmt(
+    lambda: select(func.count())
+    .select_from(Job)
+    .where(Job.status == JobStatus.QUEUED.value)
+)
+
+# Prepared once for the progress flush: a Core-level update so executemany
+# batches all pending rows into one transaction, with bind parameters the
+# only thing that changes between flushes. The status guard makes flushes
+# that snapshotted their values before a terminal transition committed
+# (or before a job was requeued) no-ops instead of stale overwrites.
+_FLUSH_PROGRESS_STMT = (
+    update(Job.__table__)
+    .where(Job.__table__.c.id == bindparam("b_id"))
+    .where(Job.__table__.c.status == JobStatus.RUNNING.value)
+    .values(progress=bindparam("b_progress"))
+)
+
 
 class JobQueueManager:
     """Manages job queue using SQLite database"""
-    
+
+    def __init__(self):
+        # Write-through LRU of recently seen jobs. The active working set
+        # is tiny, and this process is the only writer, so a by-id lookup
+        # can skip the SQL round-trip entirely.
+        self._cache: OrderedDict[str, Job] = OrderedDict()
+        self._cache_max = 512
+        self._cache_lock = asyncio.Lock()
+
+        # Progress updates are coalesced here and flushed roughly once a
+        # second - one fsync per interval instead of one per progress tick
+        self._pending_progress: dict[str, int] = {}
+        self._flush_interval = 1.0
+        self._flush_task: Optional[asyncio.Task] = None
+
+        # Periodic pruning of finished jobs (started from app lifespan)
+        self._prune_task: Optional[asyncio.Task] = None
+
+    async def _cache_put(self, job: Job) -> None:
+        """Insert or refresh a cache entry, evicting the oldest if full"""
+        async with self._cache_lock:
+            self._cache[job.id] = job
+            self._cache.move_to_end(job.id)
+            while len(self._cache) > self._cache_max:
+                self._cache.popitem(last=False)
+
+    async def _cache_evict(self, job_id: str) -> None:
+        """Drop a cache entry (after delete)"""
+        async with self._cache_lock:
+            self._cache.pop(job_id, None)
+
     async def create_job(
         self,
         session: AsyncSession,
@@ -24,28 +92,43 @@ class JobQueueManager:
         parameters: JobParameters
     ) -> Job:
         """Create a new job"""
+        # ULIDs sort by creation time, so primary-key inserts append to the
+        # hot end of the B-tree instead of splitting random pages
         job = Job(
-            id=str(uuid.uuid4()),
+            id=str(ULID()),
             filename=filename,
             filepath=str(filepath),
             status=JobStatus.QUEUED.value,
             created_at=utc_now(),
-            parameters=json.dumps(parameters.model_dump())
+            # pydantic-core serializes straight to JSON in one pass; no
+            # intermediate dict + json.dumps walk
+            parameters=parameters.model_dump_json()
         )
-        
+        job._parsed_params = parameters
+
         session.add(job)
         await session.commit()
-        await session.refresh(job)
-        
+        # No refresh: every column is populated in Python above and the
+        # sessionmaker runs with expire_on_commit=False, so re-SELECTing
+        # the row we just wrote would be a wasted round-trip
+        await self._cache_put(job)
+
         logger.info(f"Created job {job.id}: {filename}")
         return job
     
     async def get_job(self, session: AsyncSession, job_id: str) -> Optional[Job]:
-        """Get job by ID"""
-        result = await session.execute(
-            select(Job).where(Job.id == job_id)
-        )
-        return result.scalar_one_or_none()
+        """Get job by ID (cache first, then database)"""
+        async with self._cache_lock:
+            job = self._cache.get(job_id)
+            if job is not None:
+                self._cache.move_to_end(job_id)
+                return job
+
+        result = await session.execute(_GET_JOB_STMT, {"id": job_id})
+        job = result.scalar_one_or_none()
+        if job is not None:
+            await self._cache_put(job)
+        return job
     
     async def get_all_jobs(
         self,
@@ -60,32 +143,116 @@ class JobQueueManager:
             query = query.where(Job.status == status.value)
         
         result = await session.execute(query)
-        return list(result.scalars().all())
+        # .all() already returns a list; no need to copy it
+        return result.scalars().all()
     
     async def get_next_job(self, session: AsyncSession) -> Optional[Job]:
         """Get next queued job (FIFO)"""
-        result = await session.execute(
-            select(Job)
+        result = await session.execute(_NEXT_JOB_STMT)
+        return result.scalar_one_or_none()
+    
+    async def claim_jobs(self, session: AsyncSession, limit: int = 4) -> List[Job]:
+        """Atomically claim up to limit queued jobs (FIFO), marking them running
+
+        Fuses get_next_job + the RUNNING status update into a single
+        UPDATE ... RETURNING, so two workers can never claim the same job.
+        """
+        # FOR UPDATE SKIP LOCKED keeps concurrent claimers from blocking on
+        # the same rows if this ever runs against Postgres; SQLite's dialect
+        # simply drops the clause, where the atomic UPDATE already suffices
+        next_ids = (
+            select(Job.id)
             .where(Job.status == JobStatus.QUEUED.value)
             .order_by(Job.created_at.asc())
-            .limit(1)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+            .scalar_subquery()
         )
-        return result.scalar_one_or_none()
-    
-    async def get_queue_position(self, session: AsyncSession, job_id: str) -> int:
-        """Get position of job in queue (1-indexed)"""
-        job = await self.get_job(session, job_id)
-        if not job or job.status != JobStatus.QUEUED.value:
-            return 0
-        
-        # Count jobs created before this one that are still queued
         result = await session.execute(
-            select(func.count(Job.id))
+            update(Job)
+            .where(Job.id.in_(next_ids))
+            .values(
+                status=JobStatus.RUNNING.value,
+                started_at=utc_now()
+            )
+            .returning(Job)
+        )
+        # RETURNING rows come back in no guaranteed order
+        jobs = sorted(result.scalars().all(), key=lambda j: j.created_at)
+        await session.commit()
+
+        for job in jobs:
+            await self._cache_put(job)
+            logger.info(f"Claimed job {job.id}: {job.filename}")
+        return jobs
+
+    async def claim_next_job(self, session: AsyncSession) -> Optional[Job]:
+        """Atomically claim the next queued job (FIFO) and mark it running"""
+        jobs = await self.claim_jobs(session, limit=1)
+        return jobs[0] if jobs else None
+
+    async def requeue_jobs(self, session: AsyncSession, job_ids: List[str]) -> None:
+        """Return claimed-but-unstarted jobs to the queue (shutdown path)"""
+        if not job_ids:
+            return
+        result = await session.execute(
+            update(Job)
+            .where(Job.id.in_(job_ids))
+            .where(Job.status == JobStatus.RUNNING.value)
+            .values(status=JobStatus.QUEUED.value, started_at=None, progress=0)
+            .returning(Job)
+        )
+        jobs = result.scalars().all()
+        await session.commit()
+
+        for job in jobs:
+            await self._cache_put(job)
+            logger.info(f"Requeued job {job.id}")
+
+    async def get_queue_position(self, session: AsyncSession, job_id: str) -> int:
+        """Get position of job in queue (1-indexed, 0 if not queued)"""
+        # Number the queued set in creation order and pick this job's row -
+        # one round-trip, answered from the (status, created_at) index
+        queued = (
+            select(
+                Job.id,
+                func.row_number().over(order_by=Job.created_at.asc()).label("position")
+            )
             .where(Job.status == JobStatus.QUEUED.value)
-            .where(Job.created_at <= job.created_at)
+            .subquery()
+        )
+        result = await session.execute(
+            select(queued.c.position).where(queued.c.id == job_id)
         )
         return result.scalar() or 0
     
+    async def get_jobs_with_positions(
+        self,
+        session: AsyncSession,
+        status: Optional[JobStatus] = None,
+        limit: int = 100
+    ) -> List[tuple]:
+        """Get jobs with their queue positions in a single query
+
+        Returns (job, position) pairs in reverse chronological order;
+        position is 1-indexed for queued jobs and None otherwise.
+        """
+        position = (
+            func.row_number()
+            .over(partition_by=Job.status, order_by=Job.created_at.asc())
+            .label("position")
+        )
+        query = select(Job, position).order_by(Job.created_at.desc()).limit(limit)
+
+        if status:
+            query = query.where(Job.status == status.value)
+
+        result = await session.execute(query)
+        return [
+            (job, pos if job.status == JobStatus.QUEUED.value else None)
+            for job, pos in result.all()
+        ]
+
     async def update_job_status(
         self,
         session: AsyncSession,
@@ -94,68 +261,212 @@ class JobQueueManager:
         progress: Optional[int] = None,
         error: Optional[str] = None
     ) -> Optional[Job]:
-        """Update job status"""
-        job = await self.get_job(session, job_id)
-        if not job:
-            return None
-        
-        job.status = status.value
-        
+        """Update job status with a single UPDATE ... RETURNING round-trip"""
+        values = {"status": status.value}
+
+        # Fold any batched progress into this durable write; a flush that
+        # already snapshotted the old value is neutralized by the RUNNING
+        # guard on _FLUSH_PROGRESS_STMT
+        pending = self._pending_progress.pop(job_id, None)
+        if progress is None:
+            progress = pending
+
         if progress is not None:
-            job.progress = progress
-        
+            values["progress"] = progress
+
         if error is not None:
-            job.error = error
-        
+            values["error"] = error
+
         # Update timestamps
-        if status == JobStatus.RUNNING and not job.started_at:
-            job.started_at = utc_now()
+        if status == JobStatus.RUNNING:
+            # Only stamp the first transition to running
+            values["started_at"] = func.coalesce(Job.started_at, utc_now())
         elif status in [JobStatus.COMPLETED, JobStatus.FAILED, JobStatus.CANCELLED]:
-            job.completed_at = utc_now()
-        
+            values["completed_at"] = utc_now()
+
+        result = await session.execute(
+            update(Job).where(Job.id == job_id).values(**values).returning(Job)
+        )
+        job = result.scalar_one_or_none()
         await session.commit()
-        await session.refresh(job)
-        
+
+        if job is None:
+            await self._cache_evict(job_id)
+            return None
+
+        await self._cache_put(job)
         logger.info(f"Updated job {job_id}: status={status.value}, progress={progress}")
         return job
     
+    async def report_progress(self, job_id: str, progress: int) -> None:
+        """Record a progress update for batched flushing
+
+        Just stores the latest value; the flush loop writes pending updates
+        in one transaction per interval. Terminal status transitions fold
+        pending progress into their own durable write (update_job_status).
+        """
+        self._pending_progress[job_id] = progress
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_loop())
+
+        # Keep cached instances current so reads see fresh progress
+        # without waiting for the flush; same lock discipline as every
+        # other cache accessor
+        async with self._cache_lock:
+            job = self._cache.get(job_id)
+            if job is not None:
+                job.progress = progress
+
+    async def _flush_loop(self) -> None:
+        """Flush pending progress once per interval until none remains"""
+        while self._pending_progress:
+            await asyncio.sleep(self._flush_interval)
+            try:
+                await self.flush_progress()
+            except Exception as e:
+                logger.error(f"Error flushing progress updates: {e}")
+
+    async def flush_progress(self) -> None:
+        """Write all pending progress updates in a single transaction"""
+        if not self._pending_progress:
+            return
+        pending, self._pending_progress = self._pending_progress, {}
+
+        async with AsyncSessionLocal() as session:
+            await session.execute(
+                _FLUSH_PROGRESS_STMT,
+                [{"b_id": job_id, "b_progress": pct} for job_id, pct in pending.items()]
+            )
+            await session.commit()
+
+    async def prune_completed(self, session: AsyncSession, keep_last: int = 1000) -> int:
+        """Delete finished jobs beyond the most recent keep_last
+
+        The jobs table is a queue - old completed/failed/cancelled rows
+        only bloat the file and its indexes. Returns the number pruned.
+        """
+        keep = (
+            select(Job.id)
+            .where(Job.status.in_(_TERMINAL_VALUES))
+            .order_by(Job.completed_at.desc())
+            .limit(keep_last)
+            .scalar_subquery()
+        )
+        result = await session.execute(
+            delete(Job)
+            .where(Job.status.in_(_TERMINAL_VALUES))
+            .where(Job.id.not_in(keep))
+            .returning(Job.id)
+        )
+        pruned_ids = result.scalars().all()
+        await session.commit()
+
+        for job_id in pruned_ids:
+            await self._cache_evict(job_id)
+
+        if pruned_ids:
+            logger.info(f"Pruned {len(pruned_ids)} finished jobs")
+        return len(pruned_ids)
+
+    def start_pruning(self, interval: float = 300.0) -> None:
+        """Start the periodic prune task (call from app startup)"""
+        if self._prune_task is None or self._prune_task.done():
+            self._prune_task = asyncio.create_task(self._prune_loop(interval))
+
+    async def _prune_loop(self, interval: float) -> None:
+        """Prune finished jobs every interval seconds"""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                async with AsyncSessionLocal() as session:
+                    await self.prune_completed(session)
+            except Exception as e:
+                logger.error(f"Error pruning finished jobs: {e}")
+
+    async def stop(self) -> None:
+        """Stop background tasks and write out any pending progress"""
+        if self._prune_task is not None:
+            self._prune_task.cancel()
+            self._prune_task = None
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+        await self.flush_progress()
+
+    async def filepath_in_use(
+        self,
+        session: AsyncSession,
+        filepath: str,
+        exclude_job_id: Optional[str] = None
+    ) -> bool:
+        """Check whether any active job still references an uploaded file
+
+        Uploads are content-addressed, so several jobs can share one file
+        on disk - it must only be removed once no queued/running/paused
+        job points at it.
+        """
+        query = (
+            select(func.count())
+            .select_from(Job)
+            .where(Job.filepath == str(filepath))
+            .where(Job.status.in_([
+                JobStatus.QUEUED.value,
+                JobStatus.RUNNING.value,
+                JobStatus.PAUSED.value
+            ]))
+        )
+        if exclude_job_id is not None:
+            query = query.where(Job.id != exclude_job_id)
+
+        result = await session.execute(query)
+        return (result.scalar() or 0) > 0
+
     async def delete_job(self, session: AsyncSession, job_id: str) -> bool:
-        """Delete a job (and its file)"""
+        """Delete a job (and its file, unless another job still needs it)"""
         job = await self.get_job(session, job_id)
         if not job:
             return False
-        
-        # Delete file if exists
+
+        # Delete file if it exists and no other active job shares it
         try:
             filepath = Path(job.filepath)
-            if filepath.exists():
+            if filepath.exists() and not await self.filepath_in_use(session, job.filepath, exclude_job_id=job_id):
                 filepath.unlink()
                 logger.info(f"Deleted file: {filepath}")
         except Exception as e:
             logger.error(f"Error deleting file {job.filepath}: {e}")
         
-        # Delete from database
-        await session.delete(job)
+        # Delete from database by id - the cached instance may belong to
+        # another (already closed) session, so don't hand it to this one
+        await session.execute(delete(Job).where(Job.id == job_id))
         await session.commit()
-        
+        await self._cache_evict(job_id)
+
         logger.info(f"Deleted job {job_id}")
         return True
     
     async def get_queue_size(self, session: AsyncSession) -> int:
         """Get number of queued jobs"""
-        result = await session.execute(
-            select(func.count(Job.id)).where(Job.status == JobStatus.QUEUED.value)
-        )
+        # count(*) rather than count(id) lets SQLite answer straight from
+        # the (status, created_at) index without touching the id column
+        result = await session.execute(_QUEUE_SIZE_STMT)
         return result.scalar() or 0
     
     def job_to_response(self, job: Job, position: Optional[int] = None) -> JobResponse:
         """Convert database job to API response"""
-        parameters = JobParameters.model_validate_json(job.parameters) if job.parameters else JobParameters()
-        
-        return JobResponse(
+        # Parse the parameters JSON once per Job instance and remember the
+        # result, so list endpoints don't re-validate on every render
+        parameters = getattr(job, "_parsed_params", None)
+        if parameters is None:
+            parameters = JobParameters.model_validate_json(job.parameters) if job.parameters else JobParameters()
+            job._parsed_params = parameters
+
+        # Rows coming out of the database were validated on the way in, so
+        # skip Pydantic's per-field validator loop on the way out.
+        return JobResponse.model_construct(
             job_id=job.id,
             filename=job.filename,
-            status=JobStatus(job.status),
+            status=_JOB_STATUS_BY_VALUE[job.status],
             progress=job.progress,
             created_at=job.created_at,
             started_at=job.started_at,
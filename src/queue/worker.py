@@ -1,7 +1,9 @@
 """Background worker for processing job queue"""
 import asyncio
-import json
 import logging
+from collections import deque
+
+import orjson
 from pathlib import Path
 from typing import Optional
 
@@ -18,6 +20,24 @@ class JobWorker:
     def __init__(self):
         self.running = False
         self.task: Optional[asyncio.Task] = None
+        # Poll interval backs off exponentially while idle (fast pickup
+        # right after a job finishes, few DB round-trips when quiet) and
+        # resets to the minimum on every successful dequeue. Errors use a
+        # separate, higher floor so a failing loop can't storm the DB.
+        self._min_interval = 0.1
+        self._max_interval = 5.0
+        self._backoff = 1.5
+        self._idle_interval = self._min_interval
+        self._error_interval = 1.0
+        # Set by the enqueue path so new jobs are picked up immediately
+        # instead of waiting out the current backoff interval
+        self.wake_event = asyncio.Event()
+        # Set by stop() so the loop exits without waiting out a sleep
+        self._stop_event = asyncio.Event()
+        # Jobs claimed ahead of time so back-to-back plots start without a
+        # DB round-trip in between; requeued if the worker stops first
+        self._prefetch: deque = deque()
+        self._prefetch_limit = 4
     
     async def start(self):
         """Start the worker"""
@@ -26,90 +46,132 @@ class JobWorker:
             return
         
         self.running = True
+        self._stop_event.clear()
         self.task = asyncio.create_task(self._work_loop())
         logger.info("Job worker started")
-    
+
     async def stop(self):
         """Stop the worker"""
         if not self.running:
             return
-        
+
         self.running = False
+        # Wake any pending sleep so the loop notices the stop right away,
+        # then cancel and give the task a bounded window to unwind
+        self._stop_event.set()
+        self.wake_event.set()
         if self.task:
             self.task.cancel()
-            try:
-                await self.task
-            except asyncio.CancelledError:
-                pass
-        
+            await asyncio.wait([self.task], timeout=2.0)
+
+        # Give any claimed-but-unstarted jobs back to the queue
+        if self._prefetch:
+            job_ids = [job.id for job in self._prefetch]
+            self._prefetch.clear()
+            async with AsyncSessionLocal() as session:
+                await queue_manager.requeue_jobs(session, job_ids)
+
         logger.info("Job worker stopped")
     
+    def wake(self):
+        """Wake the worker loop (called when a job is enqueued)"""
+        self.wake_event.set()
+
+    async def _idle_sleep(self):
+        """Wait out the idle interval, returning early if woken"""
+        try:
+            await asyncio.wait_for(self.wake_event.wait(), timeout=self._idle_interval)
+            # Woken by an enqueue - poll again immediately
+            self._idle_interval = self._min_interval
+        except asyncio.TimeoutError:
+            self._idle_interval = min(self._idle_interval * self._backoff, self._max_interval)
+        finally:
+            self.wake_event.clear()
+
     async def _work_loop(self):
         """Main worker loop"""
         logger.info("Worker loop started")
-        
-        while self.running:
+
+        while not self._stop_event.is_set():
             try:
                 # Check if plotter is idle
                 if plotter.state != PlotterState.IDLE:
-                    await asyncio.sleep(5)
+                    await self._idle_sleep()
                     continue
-                
-                # Get next job from queue
+
+                # One session spans the whole job lifecycle; each manager
+                # call commits, returning the connection to the pool, so
+                # nothing stays idle-in-transaction during the plot
                 async with AsyncSessionLocal() as session:
-                    next_job = await queue_manager.get_next_job(session)
-                    
+                    # Serve from the prefetch queue first, skipping anything
+                    # cancelled while it waited; fall back to claiming a
+                    # fresh batch with one atomic UPDATE
+                    next_job = None
+                    while self._prefetch:
+                        candidate = self._prefetch.popleft()
+                        current = await queue_manager.get_job(session, candidate.id)
+                        if current is not None and current.status == JobStatus.RUNNING.value:
+                            next_job = current
+                            break
+
+                    if next_job is None:
+                        claimed = await queue_manager.claim_jobs(
+                            session, limit=self._prefetch_limit
+                        )
+                        if claimed:
+                            next_job = claimed[0]
+                            self._prefetch.extend(claimed[1:])
+
                     if not next_job:
                         # No jobs in queue, sleep and check again
-                        await asyncio.sleep(5)
+                        await self._idle_sleep()
                         continue
-                    
-                    # Mark job as running
-                    await queue_manager.update_job_status(
-                        session,
-                        next_job.id,
-                        JobStatus.RUNNING,
-                        progress=0
-                    )
-                
-                logger.info(f"Processing job {next_job.id}: {next_job.filename}")
-                
-                # Parse parameters with validation
-                try:
-                    parameters = json.loads(next_job.parameters) if next_job.parameters else {}
-                except json.JSONDecodeError as e:
-                    logger.error(f"Invalid JSON parameters for job {next_job.id}: {e}")
-                    async with AsyncSessionLocal() as session:
+
+                    # A successful dequeue resets both backoffs; every path
+                    # from here leaves the try via continue, so this is the
+                    # one spot where an error-free pass provably reaches
+                    self._idle_interval = self._min_interval
+                    self._error_interval = 1.0
+                    logger.info(f"Processing job {next_job.id}: {next_job.filename}")
+
+                    # Parse parameters with validation
+                    try:
+                        parameters = orjson.loads(next_job.parameters) if next_job.parameters else {}
+                    except orjson.JSONDecodeError as e:
+                        logger.error(f"Invalid JSON parameters for job {next_job.id}: {e}")
                         await queue_manager.update_job_status(
                             session,
                             next_job.id,
                             JobStatus.FAILED,
                             error=f"Invalid job parameters: {e}"
                         )
-                    continue
-                
-                # Plot the SVG
-                svg_path = Path(next_job.filepath)
-                
-                async def progress_callback(progress: int):
-                    """Update job progress"""
-                    async with AsyncSessionLocal() as session:
-                        await queue_manager.update_job_status(
-                            session,
-                            next_job.id,
-                            JobStatus.RUNNING,
-                            progress=progress
-                        )
-                
-                success = await plotter.plot_svg(
-                    svg_path,
-                    next_job.id,
-                    parameters,
-                    progress_callback=progress_callback
-                )
-                
-                # Update final status
-                async with AsyncSessionLocal() as session:
+                        continue
+
+                    # Plot the SVG. Capture plain locals for the callback
+                    # below so the closure holds a short string, not the
+                    # whole ORM instance
+                    svg_path = Path(next_job.filepath)
+                    job_id = next_job.id
+
+                    async def progress_callback(progress: int):
+                        """Record job progress (write-behind via the manager)
+
+                        Just stores the latest value in memory; the manager's
+                        flush loop batches pending updates into one commit
+                        per second, so the plotter coroutine never blocks on
+                        a DB write. The terminal status update below folds in
+                        whatever is still pending.
+                        """
+                        await queue_manager.report_progress(job_id, progress)
+
+                    success = await plotter.plot_svg(
+                        svg_path,
+                        job_id,
+                        parameters,
+                        progress_callback=progress_callback
+                    )
+
+                    # Update final status
                     if success:
                         await queue_manager.update_job_status(
                             session,
@@ -126,21 +188,34 @@ class JobWorker:
                             error="Plotting failed"
                         )
                         logger.error(f"Job {next_job.id} failed")
-                
-                # Cleanup uploaded SVG file after job completion
-                try:
-                    if svg_path.exists():
-                        svg_path.unlink()
-                        logger.info(f"Cleaned up file: {svg_path}")
-                except Exception as e:
-                    logger.warning(f"Failed to cleanup file {svg_path}: {e}")
+
+                    # Cleanup uploaded SVG file after job completion - uploads
+                    # are content-addressed, so skip if another job shares it
+                    try:
+                        in_use = await queue_manager.filepath_in_use(
+                            session, next_job.filepath, exclude_job_id=next_job.id
+                        )
+                        if not in_use and svg_path.exists():
+                            svg_path.unlink()
+                            logger.info(f"Cleaned up file: {svg_path}")
+                    except Exception as e:
+                        logger.warning(f"Failed to cleanup file {svg_path}: {e}")
+
+                    # Loop straight back around for the next job; if plotter
+                    # teardown lags a beat, poll at the minimum interval
+                    # instead of whatever backoff the last idle spell reached
+                    self._idle_interval = self._min_interval
+                    continue
                 
             except asyncio.CancelledError:
+                # Never swallow cancellation - stop() relies on it to
+                # interrupt a plot in flight
                 logger.info("Worker loop cancelled")
-                break
+                raise
             except Exception as e:
                 logger.error(f"Error in worker loop: {e}", exc_info=True)
-                await asyncio.sleep(5)
+                await asyncio.sleep(self._error_interval)
+                self._error_interval = min(self._error_interval * self._backoff, self._max_interval)
         
         logger.info("Worker loop ended")
 